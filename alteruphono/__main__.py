@@ -49,11 +49,12 @@ def main():
     # Collect arguments (can load from a config file as well in the future)
     args = parse_arguments()
 
-    # Execute and show results
+    # Execute and show results; the string conversion is delegated to `map()` and
+    # the output is printed at once
     if args.command == "forward":
-        ret = alteruphono.forward(args.sequence, args.rule)
+        ret = " ".join(map(str, alteruphono.forward(args.sequence, args.rule)))
     elif args.command == "backward":
-        ret = [str(seq) for seq in alteruphono.backward(args.sequence, args.rule)]
+        ret = "\n".join(map(str, alteruphono.backward(args.sequence, args.rule)))
 
     print(ret)
 
@@ -1,80 +1,49 @@
+import functools
 import itertools
-from typing import List, Union, Tuple
+from typing import List, Union
 
-from maniphono import SegSequence, Sound, SoundSegment, Segment, BoundarySegment
+from maniphono import (
+    SegSequence,
+    Sound,
+    SoundSegment,
+    Segment,
+    BoundarySegment,
+    parse_sequence,
+)
 
-from .common import check_match
+from .common import check_match, _copy_segment
 from .model import (
     Token,
     BackRefToken,
-    EmptyToken,
     BoundaryToken,
     SegmentToken,
     ChoiceToken,
     SetToken,
 )
-from .parser import Rule
-
-
-def _backward_translate(
-    sequence: List[Segment], rule: Rule, match_info: List[Union[Segment, bool, int]]
-): # ->Tuple[List[Segment], List[Segment]]
-    # Make a copy of the ANTE as a "recons"tructed sequence; this will later be
-    # modified by back-references from the sequence that was matched
-    recons = []
-    set_index = []
-    for idx, t in enumerate(rule.ante):
-        if isinstance(t, BoundaryToken):
-            recons.append(BoundarySegment())
-        elif isinstance(t, SegmentToken):
-            recons.append(t.segment)
-        elif isinstance(t, ChoiceToken):
-            # TODO: can we get the right one? If not, make a partial sound?
-            recons.append(t)
-        elif isinstance(t, SetToken):
-            recons.append(t)
-            set_index.append(idx)
-
-    # Remove empty tokens that might be in the POST rule (and that are obviously
-    # missing from the matched subtring) and iterate over pairs of POST tokens and
-    # matched sequence tokens, filling "recons"tructed seq
-    no_empty = [token for token in rule.post if not isinstance(token, EmptyToken)]
-    for post_token, seq_token, match in zip(no_empty, sequence, match_info):
-        if isinstance(post_token, BackRefToken):
-            # build modifier to be "inverted"
-            # TODO: move this operation to maniphono
-            recons[post_token.index] = seq_token
-            if post_token.modifier:
-                modifiers = []
-                for mod in post_token.modifier.split(","):
-                    if mod[0] == "-":
-                        modifiers.append("+" + mod[1:])
-                    elif mod[0] == "+":
-                        modifiers.append("-" + mod[1:])
-                    else:
-                        modifiers.append("-" + mod)
-
-                # TODO: fix this horrible hack that uses graphemes to circumvent
-                #  difficulties with copies
-                gr = str(seq_token)
-                snd = Sound(gr)
-                snd += ",".join(modifiers)
-                recons[post_token.index] = SoundSegment([snd])
+from .parser import Rule, _parse_rule_cached
 
-        elif isinstance(post_token, SetToken):
-            # grab the index of the next set
-            idx = set_index.pop(0)
-            recons[idx] = recons[idx].choices[match]
+# Candidates are composed of segments from the sequence and of segments and tokens
+# from the rule, so boundaries can come either as maniphono segments or as tokens
+_BOUNDARY_TYPES = (BoundarySegment, BoundaryToken)
 
-        # TODO: map tokens (from alteruphono) to segments (maniphono)
 
-    return [sequence, recons]
+# Functions for building the element of the "recons"tructed sequence corresponding
+# to each kind of `ante` token, indexed by the exact class of the token so that the
+# dispatch is a single dictionary lookup; tokens of other classes are skipped
+_RECONS_BUILDERS = {
+    BoundaryToken: lambda token: BoundarySegment(),
+    SegmentToken: lambda token: token.segment,
+    # TODO: can we get the right one? If not, make a partial sound?
+    ChoiceToken: lambda token: token,
+    SetToken: lambda token: token,
+}
 
 
 # This method makes a copy of the original AST ante-tokens and applies
 # the modifiers from the post sequence; in a way, it "fakes" the
 # rule being applied, so that something like "d > @1[+voiceless]"
-# is transformed in the equivalent "t > @1".
+# is transformed in the equivalent "t > @1". Note that the tokens of the
+# rule are never modified in place, as rules can be cached and reused.
 def _carry_backref_modifier(ante_token: Token, post_token: BackRefToken) -> Token:
     """
     Internal function for applying the modifier of a back-reference to its source.
@@ -93,35 +62,325 @@ def _carry_backref_modifier(ante_token: Token, post_token: BackRefToken) -> Toke
             # TODO: can address directly .segment instead of .segment.sound[0]?
             snd = ante_token.segment.sounds[0] + post_token.modifier
             return SegmentToken(snd)
-            #x = ante_token.segment.sounds[0]
-            #return x + post_token.modifier
 
         # TODO: can we join choice and set into a single signature?
-        elif isinstance(ante_token, SetToken):
+        elif isinstance(ante_token, (SetToken, ChoiceToken)):
+            choices = []
             for choice in ante_token.choices:
+                choice = SegmentToken(choice.segment)
                 choice.add_modifier(post_token.modifier)
+                choices.append(choice)
 
-        elif isinstance(ante_token, ChoiceToken):
-            for choice in ante_token.choices:
-                choice.add_modifier(post_token.modifier)
+            return type(ante_token)(choices)
 
     # return non-modified
     return ante_token
 
 
-# TODO: make sure it works with repeated backreferences, such as "V s > @1 z @1",
-# which we *cannot* have mapped only as "V z V"
-def backward(post_seq: SegSequence, rule: Rule) -> List[SegSequence]:
-    # Compute the `post_ast`, applying modifiers and skipping nulls
-    post_ast = [token for token in rule.post if not isinstance(token, EmptyToken)]
+# The views of a rule used in backward direction depend only on the rule, so they
+# are computed once per rule and cached, instead of at every application (rules
+# compare and hash by their source)
+@functools.lru_cache(maxsize=1024)
+def _compile_post(rule: Rule) -> List[Token]:
+    """
+    Internal function for building the pattern matched in backward direction.
 
-    post_ast = [
+    The pattern holds the tokens of `post`, skipping nulls; back-references are
+    replaced by the `ante` token they refer to, with the modifier applied.
+
+    @param rule: The rule to be applied.
+    @return: The list of tokens to be matched.
+    """
+
+    return [
         token
         if not isinstance(token, BackRefToken)
         else _carry_backref_modifier(rule.ante[token.index], token)
-        for token in post_ast
+        for token in rule.post_no_empty
     ]
 
+
+@functools.lru_cache(maxsize=1024)
+def _recons_template(rule: Rule) -> list:
+    """
+    Internal function for building the template of a reconstructed sequence.
+
+    Boundaries are replaced by boundary segments and segment tokens by their
+    segments, while choices and sets are kept as tokens.
+
+    @param rule: The rule to be applied.
+    @return: The template, to be copied and filled for each match.
+    """
+
+    return [
+        _RECONS_BUILDERS[type(token)](token)
+        for token in rule.ante
+        if type(token) in _RECONS_BUILDERS
+    ]
+
+
+# Modifiers are drawn from the small set found in the rules, and are inverted every
+# time a back-reference with a modifier is matched, so the results are cached
+@functools.lru_cache(maxsize=256)
+def _invert_modifier(modifier: str) -> str:
+    """
+    Internal function for inverting the feature values of a back-reference modifier.
+
+    @param modifier: The modifier, as a comma-separated list of feature values.
+    @return: The inverted modifier.
+    """
+
+    # build modifier to be "inverted"
+    # TODO: move this operation to maniphono
+    modifiers = []
+    for mod in modifier.split(","):
+        if mod[0] == "-":
+            modifiers.append("+" + mod[1:])
+        elif mod[0] == "+":
+            modifiers.append("-" + mod[1:])
+        else:
+            modifiers.append("-" + mod)
+
+    return ",".join(modifiers)
+
+
+def _backward_translate(
+    sequence: List[Segment], rule: Rule, match_info: List[Union[Segment, bool, int]]
+): # ->Tuple[List[Segment], List[Segment]]
+    # Make a copy of the ANTE as a "recons"tructed sequence; this will later be
+    # modified by back-references from the sequence that was matched. The segments
+    # of the template are copied as well, as they are owned by the (cached) rule.
+    recons = [_copy_segment(element) for element in _recons_template(rule)]
+    set_index = iter(rule.ante_set_indices)
+
+    # Remove empty tokens that might be in the POST rule (and that are obviously
+    # missing from the matched subtring) and iterate over pairs of POST tokens and
+    # matched sequence tokens, filling "recons"tructed seq
+    for post_token, seq_token, match in zip(rule.post_no_empty, sequence, match_info):
+        if isinstance(post_token, BackRefToken):
+            recons[post_token.index] = seq_token
+            if post_token.modifier:
+                # TODO: fix this horrible hack that uses graphemes to circumvent
+                #  difficulties with copies
+                gr = str(seq_token)
+                snd = Sound(gr)
+                snd += _invert_modifier(post_token.modifier)
+                recons[post_token.index] = SoundSegment([snd])
+
+        elif isinstance(post_token, SetToken):
+            # grab the index of the next set
+            idx = next(set_index)
+            recons[idx] = _copy_segment(recons[idx].choices[match].segment)
+
+        # TODO: map tokens (from alteruphono) to segments (maniphono)
+
+    return [sequence, recons]
+
+
+def _same_segments(segments: List[Segment], other: List[Segment]) -> bool:
+    """
+    Internal function for checking if two lists hold the same segments.
+    """
+
+    if len(segments) != len(other):
+        return False
+
+    return all(
+        seg is other_seg or seg == other_seg for seg, other_seg in zip(segments, other)
+    )
+
+
+def _unique_alternatives(alternatives: List[List[Segment]]) -> List[List[Segment]]:
+    """
+    Internal function for removing repeated alternatives for a position.
+
+    Alternatives are compared segment by segment, by identity and then by equality,
+    keeping the first occurrence and the original order. Their textual
+    representation is not used, as it is expensive to compute (maniphono rebuilds
+    graphemes from feature values); alternatives that differ but are rendered in the
+    same way are collapsed later, when deduplicating whole candidates.
+
+    @param alternatives: The list of alternatives for a position.
+    @return: The list of unique alternatives.
+    """
+
+    unique = []
+    for alt in alternatives:
+        if not any(_same_segments(alt, other) for other in unique):
+            unique.append(alt)
+
+    return unique
+
+
+def _prune_alternatives(
+    ante_seqs: List[List[List[Segment]]],
+) -> List[List[List[Segment]]]:
+    """
+    Internal function for removing alternatives that can only yield internal boundaries.
+
+    An alternative is removed if it carries a boundary that is certainly internal to
+    all candidates, that is, a boundary preceded and followed by at least one
+    segment either in the alternative itself or in other positions that always
+    contribute segments. If all the alternatives of a position are removed, its list
+    is left empty, so that no candidate is generated at all.
+
+    @param ante_seqs: A list with the alternatives for each position of the sequence.
+    @return: The list of alternatives for each position, after pruning.
+    """
+
+    # Collect the first and last positions whose alternatives all contribute at least
+    # one segment
+    filled = [idx for idx, alts in enumerate(ante_seqs) if all(alts)]
+    first_filled = filled[0] if filled else len(ante_seqs)
+    last_filled = filled[-1] if filled else -1
+
+    pruned = []
+    for idx, alts in enumerate(ante_seqs):
+        before, after = first_filled < idx, last_filled > idx
+        pruned.append(
+            [
+                alt
+                for alt in alts
+                if not any(
+                    isinstance(segment, _BOUNDARY_TYPES)
+                    and (before or seg_idx > 0)
+                    and (after or seg_idx < len(alt) - 1)
+                    for seg_idx, segment in enumerate(alt)
+                )
+            ]
+        )
+
+    return pruned
+
+
+def _merge_fixed_alternatives(
+    ante_seqs: List[List[List[Segment]]],
+) -> List[List[List[Segment]]]:
+    """
+    Internal function for merging adjacent positions with a single alternative.
+
+    Positions with a single alternative (such as the segments that were not matched
+    by the rule) contribute the same segments to all candidates, so that runs of
+    them can be concatenated into a single position, removing dimensions from the
+    cartesian product.
+
+    @param ante_seqs: A list with the alternatives for each position of the sequence.
+    @return: The list of alternatives for each position, after merging.
+    """
+
+    merged = []
+    for alts in ante_seqs:
+        if len(alts) == 1 and merged and len(merged[-1]) == 1:
+            merged[-1][0].extend(alts[0])
+        elif len(alts) == 1:
+            # copy the alternative, so that the original one is not extended
+            merged.append([list(alts[0])])
+        else:
+            merged.append(alts)
+
+    return merged
+
+
+def _may_yield_internal_boundaries(alternatives: List[List[List[Segment]]]) -> bool:
+    """
+    Internal function for checking if alternatives might yield internal boundaries.
+
+    The check is conservative: only the boundaries at the very start of the
+    alternatives of the first position and at the very end of those of the last
+    position are known to never be internal.
+
+    @param alternatives: A list with the alternatives for each position.
+    @return: Whether any combination of the alternatives might carry a boundary
+        that is not at the start or at the end.
+    """
+
+    last_idx = len(alternatives) - 1
+    for idx, alts in enumerate(alternatives):
+        for alt in alts:
+            for seg_idx, segment in enumerate(alt):
+                if not isinstance(segment, _BOUNDARY_TYPES):
+                    continue
+                if idx == 0 and seg_idx == 0:
+                    continue
+                if idx == last_idx and seg_idx == len(alt) - 1:
+                    continue
+                return True
+
+    return False
+
+
+def _iter_candidates(ante_seqs: List[List[List[Segment]]]):
+    """
+    Internal generator of the candidate proto-forms from the alternatives per position.
+
+    @param ante_seqs: A list with the alternatives for each position of the sequence.
+    @return: A generator of pairs of the textual representation of each unique
+        candidate and the candidate itself as a `SegSequence`, excluding candidates
+        with internal boundaries.
+    """
+
+    # Due to difficulties in dealing with rules composed only of boundaries (especially
+    # when they involve deletions, like `C > :null: / _ #`, we need to make sure no
+    # proto-form with internal boundaries are generated here. This code might not seem
+    # so elegant, but makes it easier to understand what we are doing, and allows us
+    # to follow the established practices of using a single symbol ("#") for both
+    # leading and trailing boundaries (compare with regular expressions with "^" and "$").
+    # Note that the check is performed before building the `SegSequence`, which would
+    # only add boundaries at the ends, so that rejected candidates are never built.
+    # Alternatives that would lead to internal boundaries in all their combinations
+    # are removed beforehand, pruning whole sections of the cartesian product, and
+    # the check is skipped entirely when no alternative can place a boundary inside.
+    # Different combinations of alternatives might also lead to the same proto-form,
+    # so candidates are deduplicated by their textual representation as they are
+    # generated; this representation is expensive to compute (maniphono rebuilds
+    # graphemes from feature values), so it is yielded along with each candidate,
+    # allowing the caller to sort without computing it again.
+    seen = set()
+    alternatives = _merge_fixed_alternatives(_prune_alternatives(ante_seqs))
+    check_boundaries = _may_yield_internal_boundaries(alternatives)
+    for candidate in itertools.product(*alternatives):
+        segments = list(itertools.chain.from_iterable(candidate))
+
+        # Check for internal boundaries
+        if check_boundaries and any(
+            isinstance(token, _BOUNDARY_TYPES) for token in segments[1:-1]
+        ):
+            continue
+
+        # The key is taken from the `SegSequence`, as boundaries are added at the
+        # ends of the candidates that lack them
+        seq = SegSequence(segments, boundaries=True)
+        key = str(seq)
+        if key not in seen:
+            seen.add(key)
+            yield key, seq
+
+
+# TODO: make sure it works with repeated backreferences, such as "V s > @1 z @1",
+# which we *cannot* have mapped only as "V z V"
+def backward(
+    post_seq: Union[str, SegSequence], rule: Union[str, Rule]
+) -> List[SegSequence]:
+    # Parse the arguments if necessary; rules given as strings are cached
+    if isinstance(post_seq, str):
+        post_seq = parse_sequence(post_seq, boundaries=True)
+    if isinstance(rule, str):
+        rule = _parse_rule_cached(rule)
+
+    # Get the `post_ast`, with modifiers applied and nulls skipped; it is computed
+    # only once per rule
+    post_ast = _compile_post(rule)
+
+    # Cache the lengths of `post_seq` and `post_ast` for speed
+    len_seq = len(post_seq)
+    len_rule = len(post_ast)
+
+    # A `post` composed only of nulls (such as in `C > :null:`, without context)
+    # would match an empty subsequence at every position, and the deleted segments
+    # could have been anywhere in the sequence, so it cannot be reconstructed
+    if len_rule == 0:
+        raise ValueError(f"Cannot apply a rule with an empty `post` backward: {rule}")
+
     # Iterate over the sequence, checking if subsequences match the specified `post`.
     # We operate inside a `while True` loop because we don't allow overlapping
     # matches, and, as such, the `idx` might be updated either with +1 (looking for
@@ -131,44 +390,37 @@ def backward(post_seq: SegSequence, rule: Rule) -> List[SegSequence]:
     idx = 0
     ante_seqs = []
     while True:
-        # TODO: implement a better subsetting of sequence, as a normal python Sequence
-        sub_seq: List[Segment] = [
-            post_seq[i] for i in range(idx, min(len(post_seq), idx + len(post_ast)))
-        ]
+        # Near the end of the sequence there might not be enough segments left for a
+        # match, in which case we can skip slicing and matching altogether (an empty
+        # sequence has nothing to be matched at all)
+        if idx + len_rule > len_seq:
+            if idx == len_seq:
+                break
 
-        match, match_list = check_match(sub_seq, post_ast)
-
-        if len(match_list) == 0:
-            break
-
-        if match:
-            ante_seqs.append(_backward_translate(sub_seq, rule, match_list))
-            idx += len(post_ast)
-        else:
             # TODO: remove these nested lists if possible
             ante_seqs.append([[post_seq[idx]]])
             idx += 1
+        else:
+            sub_seq: List[Segment] = post_seq[idx : idx + len_rule]
 
-        if idx == len(post_seq):
-            break
+            match, match_list = check_match(sub_seq, post_ast)
 
-    ante_seqs = [
-        SegSequence(list(itertools.chain.from_iterable(candidate)), boundaries=True)
-        for candidate in itertools.product(*ante_seqs)
-    ]
+            if match:
+                # The alternatives might be identical (e.g., when the rule does not
+                # change the matched segments), which would lead to repeated candidates
+                alternatives = _backward_translate(sub_seq, rule, match_list)
+                ante_seqs.append(_unique_alternatives(alternatives))
+                idx += len_rule
+            else:
+                ante_seqs.append([[post_seq[idx]]])
+                idx += 1
 
-    # Due to difficulties in dealing with rules composed only of boundaries (especially
-    # when they involve deletions, like `C > :null: / _ #`, we need to make sure no
-    # proto-form with internal boundaries are generated here. This code might not seem
-    # so elegant, but makes it easier to understand what we are doing, and allows us
-    # to follow the established practices of using a single symbol ("#") for both
-    # leading and trailing boundaries (compare with regular expressions with "^" and "$")
-    filtered = []
-    for seq in ante_seqs:
-        # Check for internal boundaries
-        if not any([isinstance(token, BoundaryToken) for token in seq[1:-1]]):
-            filtered.append(seq)
+        if idx == len_seq:
+            break
+
+    # Candidates are generated lazily, so that the cartesian product of all the
+    # alternatives is never materialized in memory; they are sorted by the textual
+    # representation computed during deduplication (which is unique per candidate)
+    candidates = sorted(_iter_candidates(ante_seqs), key=lambda pair: pair[0])
 
-    # TODO: must take set, as the rule might lead to the same pattern multiple times
-    filtered = sorted(filtered, key=str)
-    return filtered
+    return [seq for _, seq in candidates]
@@ -9,6 +9,138 @@ from maniphono import Segment, SoundSegment, Sound
 from .model import Token, ChoiceToken, SetToken, SegmentToken, BoundaryToken
 
 
+def _copy_segment(segment: Segment) -> Segment:
+    """
+    Internal function for copying a sound segment, returning other values as they are.
+
+    Segments owned by rules (which might be cached and reused) must never be returned
+    to the user as they are, as they could later be modified in place, e.g. with
+    `.add_fvalues()`, changing the rule itself.
+    """
+
+    if not isinstance(segment, SoundSegment):
+        return segment
+
+    # Building the sounds with `Sound(description=...)` would set and validate each
+    # feature value again (and `copy.copy()` does not work with maniphono sounds), so
+    # the attributes are copied directly; the tuple of feature values is shared, which
+    # is safe as sounds replace it when setting values, instead of modifying it
+    sounds = []
+    for snd in segment.sounds:
+        new_snd = Sound.__new__(Sound)
+        new_snd.fvalues, new_snd.partial, new_snd.model = (
+            snd.fvalues,
+            snd.partial,
+            snd.model,
+        )
+        sounds.append(new_snd)
+
+    return SoundSegment(sounds)
+
+
+def _match_one(token: Segment, ref: Token) -> Union[Segment, bool, int]:
+    """
+    Internal function for matching a single token against a single reference.
+
+    References with no matching function (such as focus and empty tokens) match any
+    token, as in `check_match()`. This is used for the alternatives of choices and
+    sets, avoiding the allocation of single-element lists for `check_match()`.
+    """
+
+    matcher = _MATCHERS.get(type(ref))
+    if matcher is None:
+        return True
+
+    return matcher(token, ref)
+
+
+def _match_choice(token: Segment, ref: ChoiceToken) -> Union[Segment, bool]:
+    """
+    Internal function for matching a token against a choice, returning the token.
+    """
+
+    for choice in ref.choices:
+        # Matches all segments, such as boundaries and sounds
+        if _match_one(token, choice) is not False:
+            return token
+
+    return False
+
+
+def _match_set(token: Segment, ref: SetToken) -> Union[int, bool]:
+    """
+    Internal function for matching a token against a set, returning the index.
+    """
+
+    # Check if it is a set correspondence, which effectively works as a
+    # choice here (but we need to keep track of) which set alternative
+    # was matched; as in choices, the first alternative that matches wins, so we
+    # can return its index without checking the remaining ones
+    for idx, alt in enumerate(ref.choices):
+        if _match_one(token, alt) is not False:
+            return idx
+
+    return False
+
+
+def _match_segment(token: Segment, ref: SegmentToken) -> bool:
+    """
+    Internal function for matching a token against a segment.
+    """
+
+    # TODO: currently working only with monosonic segments
+    # If the reference segment is not partial, we can just compare `token` to
+    # `ref.segment`; if it is partial, we can compare the sounds in each
+    # with the `>=` overloaded operator, which also involves making sure
+    # `token` itself is a segment
+    sound = ref.sound
+    if not sound.partial:
+        return token == ref.segment
+
+    if not isinstance(token, SoundSegment):
+        return False
+
+    return token.sounds[0] >= sound
+
+
+def _match_sound(token: Segment, ref: Sound) -> bool:
+    """
+    Internal function for matching a token against a sound.
+    """
+
+    # TODO: check how similar to the above (ref.type==segment)
+    # TODO: check why it is capturing as maniphono.sound.Sound and not SoundSegment
+    if not ref.partial:
+        return token == ref
+
+    if not isinstance(token, SoundSegment):
+        return False
+
+    return token.sounds[0] >= ref
+
+
+def _match_boundary(token: Segment, ref: BoundaryToken) -> bool:
+    """
+    Internal function for matching a token against a boundary.
+    """
+
+    return str(token) == "#"
+
+
+# Table of the functions for matching a token against each kind of reference. The
+# table is indexed by the exact class of the reference, so that the dispatch in
+# `check_match()` is a single dictionary lookup instead of a chain of `isinstance()`
+# checks for every position; references of other classes (such as focus and
+# empty tokens) are skipped
+_MATCHERS = {
+    ChoiceToken: _match_choice,
+    SetToken: _match_set,
+    SegmentToken: _match_segment,
+    Sound: _match_sound,
+    BoundaryToken: _match_boundary,
+}
+
+
 # Note that we need to return a list because in the check_match we are retuning
 # not only a boolean of whether there is a match, but also the index of the
 # backr eference in case there is one (added +1)
@@ -22,68 +154,57 @@ def check_match(
 ) -> Tuple[bool, List[Union[Segment, bool, int]]]:
     """
     Check if a sequence matches a given pattern.
+
+    The function stops at the first position that does not match, so that no
+    information is available on the remaining positions in case of failure.
+
+    @param sequence: The list of segments to be checked.
+    @param pattern: The list of tokens to be matched.
+    @return: A tuple with a boolean indicating whether there is a match and a list
+        with the match information for each token of the pattern, skipping focus and
+        empty tokens (either `True`, the segment matched by a choice, or the index
+        of the matched set alternative). In case of failure, including length
+        mismatches, the list is always empty (earlier versions returned a list with
+        `False` values for the positions).
     """
 
     # If there is a length mismatch, it does not match by definition. Note that
     # standard forward and backward operations will never pass sequences and patterns
     # mismatching in length, but it is worth to keep this check as the method can
     # be invoked directly by users, and the length checking is much faster than
-    # performing the entire loop.
+    # performing the entire loop. In all cases of failure, an empty list is
+    # returned along with `False`, as there is no match information to report.
     if len(sequence) != len(pattern):
-        return False, [False] * len(sequence)
+        return False, []
+
+    # Patterns anchored at a boundary (such as contexts "# _" and "_ #") can only
+    # match windows that start or end with one, which is seldom the case while
+    # sliding over a sequence; checking the anchors first allows to reject most
+    # windows without going through the entire loop.
+    if pattern:
+        if type(pattern[0]) is BoundaryToken and not _match_boundary(
+            sequence[0], pattern[0]
+        ):
+            return False, []
+        if type(pattern[-1]) is BoundaryToken and not _match_boundary(
+            sequence[-1], pattern[-1]
+        ):
+            return False, []
 
     # Iterate over pairs of tokens from the sequence and references from the pattern,
-    # building a `ret_list`. The latter will contain `False` in case there is no
-    # match for a position, or either the index of the backreference or `True` in
-    # case of a match.
+    # building a `ret_list`. The latter will contain either the index of the
+    # backreference or `True` in case of a match; as soon as a position does not
+    # match, we can return without checking the remaining ones. Note that we need to
+    # compare with `is False`, so that we treat zeros (that might be indexes)
+    # differently.
     ret_list = []
     for token, ref in zip(sequence, pattern):
-        if isinstance(ref, ChoiceToken):
-            match_segment = False
-            for choice in ref.choices:
-                # Matches all segments, such as boundaries and sounds
-                match, segment = check_match([token], [choice])
-                if match:
-                    match_segment = token
-                    break
-            ret_list.append(match_segment)
-        elif isinstance(ref, SetToken):
-            # Check if it is a set correspondence, which effectively works as a
-            # choice here (but we need to keep track of) which set alternative
-            # was matched
-
-            alt_matches = [check_match([token], [alt])[0] for alt in ref.choices]
-
-            if not any(alt_matches):
-                ret_list.append(False)
-            else:
-                ret_list.append(alt_matches.index(True))
-        elif isinstance(ref, SegmentToken):
-            # TODO: currently working only with monosonic segments
-            # If the reference segment is not partial, we can just compare `token` to
-            # `ref.segment`; if it is partial, we can compare the sounds in each
-            # with the `>=` overloaded operator, which also involves making sure
-            # `token` itself is a segment
-            if not ref.segment.sounds[0].partial:
-                ret_list.append(token == ref.segment)
-            else:
-                if not isinstance(token, SoundSegment):
-                    ret_list.append(False)
-                else:
-                    ret_list.append(token.sounds[0] >= ref.segment.sounds[0])
-        elif isinstance(ref, Sound):
-            # TODO: check how similar to the above (ref.type==segment)
-            # TODO: check why it is capturing as maniphono.sound.Sound and not SoundSegment
-            if not ref.partial:
-                ret_list.append(token == ref)
-            else:
-                if not isinstance(token, SoundSegment):
-                    ret_list.append(False)
-                else:
-                    ret_list.append(token.sounds[0] >= ref)
-        elif isinstance(ref, BoundaryToken):
-            ret_list.append(str(token) == "#")
-
-    # make sure we treat zeros (that might be indexes) differently fromFalse
+        matcher = _MATCHERS.get(type(ref))
+        if matcher is not None:
+            ret = matcher(token, ref)
+            if ret is False:
+                return False, []
+            ret_list.append(ret)
+
     # TODO: return only ret_list and have the user check?
-    return all([v is not False for v in ret_list]), ret_list
+    return True, ret_list
@@ -4,10 +4,10 @@ Module with functions for forward reconstruction.
 
 from typing import List, Union
 
-from maniphono import Segment, SegSequence
+from maniphono import Segment, SegSequence, SoundSegment, parse_sequence
 
-from .common import check_match
-from .parser import Rule
+from .common import check_match, _copy_segment
+from .parser import Rule, _parse_rule_cached
 from .model import SegmentToken, SetToken, BackRefToken
 
 
@@ -33,35 +33,47 @@ def _forward_translate(
 
     # Iterate over all entries
     for entry in rule.post:
-        # Note that this will, as intended, skip over `null`s
+        # Note that this will, as intended, skip over `null`s; segments from the rule
+        # are copied, as the rule might be cached and the output modified later
         if isinstance(entry, SegmentToken):
-            post_seq.append(entry.segment)
+            post_seq.append(_copy_segment(entry.segment))
         elif isinstance(entry, SetToken):
             # The -1 in the `match` index is there to offset the +1 applied by
             # `check_match()`, so that we can differentiate False from zero.
             idx = indexes.pop(0)
-            post_seq.append(entry.choices[idx].segment)
+            post_seq.append(_copy_segment(entry.choices[idx].segment))
         elif isinstance(entry, BackRefToken):
             # TODO: deal with "correspondence"
-            # Copy the backreference, adding the modifier (even if empty, the
-            # phonomodel would only skip over it)
+            # Copy the backreference, adding the modifier only if there is one, as
+            # most backreferences carry none and the phonomodel would just skip it;
+            # the `+` operator returns a new segment, leaving the matched one as is.
+            # Other segments, such as boundaries, carry no features and are kept.
             token = sequence[entry.index]
-            token.add_fvalues(entry.modifier)
+            if entry.modifier and isinstance(token, SoundSegment):
+                token = token + entry.modifier
             post_seq.append(token)
 
     return post_seq
 
 
 # TODO: should cast the result to a SegSequence?
-def forward(ante_seq: SegSequence, rule: Rule) -> List[Segment]:
+def forward(ante_seq: Union[str, SegSequence], rule: Union[str, Rule]) -> List[Segment]:
     """
     Apply forward transformation to a sequence given a rule.
 
-    @param ante_seq:
-    @param rule:
+    @param ante_seq: The sequence to be transformed, either as a `SegSequence` or as
+        a string to be parsed.
+    @param rule: The rule to be applied, either as a `Rule` or as a string to be
+        parsed (parsed rules are cached, so that repeated applications are cheap).
     @return:
     """
 
+    # Parse the arguments if necessary
+    if isinstance(ante_seq, str):
+        ante_seq = parse_sequence(ante_seq, boundaries=True)
+    if isinstance(rule, str):
+        rule = _parse_rule_cached(rule)
+
     # Cache the lengths of `ante_seq` and `rule.ante` for speed
     len_seq = len(ante_seq)
     len_rule = len(rule.ante)
@@ -75,19 +87,22 @@ def forward(ante_seq: SegSequence, rule: Rule) -> List[Segment]:
     idx = 0
     post_seq = []
     while True:
-        # TODO: implement a better subsetting of sequence, as a normal python Sequence
-        sub_seq: List[Segment] = [
-            ante_seq[i] for i in range(idx, min(len_seq, idx + len_rule))
-        ]
-
-        match, match_info = check_match(sub_seq, rule.ante)
-
-        if match:
-            post_seq += _forward_translate(sub_seq, rule, match_info)
-            idx += len_rule
-        else:
+        # Near the end of the sequence there might not be enough segments left for a
+        # match, in which case we can skip slicing and matching altogether
+        if idx + len_rule > len_seq:
             post_seq.append(ante_seq[idx])
             idx += 1
+        else:
+            sub_seq: List[Segment] = ante_seq[idx : idx + len_rule]
+
+            match, match_info = check_match(sub_seq, rule.ante)
+
+            if match:
+                post_seq += _forward_translate(sub_seq, rule, match_info)
+                idx += len_rule
+            else:
+                post_seq.append(ante_seq[idx])
+                idx += 1
 
         if idx == len_seq:
             break
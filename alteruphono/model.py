@@ -8,7 +8,11 @@ from maniphono import parse_segment, Sound, SoundSegment
 
 # TODO: all tokens should have a method to return a corresponding segment
 
+# Tokens are created in large numbers when parsing rules and are accessed in the
+# inner loops of the matching functions, so all classes declare `__slots__`
 class Token:
+    __slots__ = ("index",)
+
     def __init__(self):
         # TODO: applies only to back-ref or should we reuse if possible for set/choice?
         self.index = None
@@ -27,6 +31,8 @@ class Token:
 
 
 class BoundaryToken(Token):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
@@ -42,6 +48,8 @@ class BoundaryToken(Token):
 
 
 class FocusToken(Token):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
@@ -57,6 +65,8 @@ class FocusToken(Token):
 
 
 class EmptyToken(Token):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
@@ -72,6 +82,8 @@ class EmptyToken(Token):
 
 
 class BackRefToken(Token):
+    __slots__ = ("modifier",)
+
     def __init__(self, index: int, modifier=None):
         super().__init__()
 
@@ -104,6 +116,8 @@ class BackRefToken(Token):
 
 
 class ChoiceToken(Token):
+    __slots__ = ("choices",)
+
     def __init__(self, choices):
         super().__init__()
         self.choices = choices
@@ -125,6 +139,8 @@ class ChoiceToken(Token):
 
 
 class SetToken(Token):
+    __slots__ = ("choices",)
+
     def __init__(self, choices):
         super().__init__()
         self.choices = choices
@@ -148,6 +164,11 @@ class SetToken(Token):
 # named segment token to distinguish from the maniphono SoundSegment
 # TODO: rename `segment` argument
 class SegmentToken(Token):
+    # The first sound of the segment is kept in its own slot, as it is the one read
+    # by the matching functions for every position; it is updated whenever the
+    # segment is replaced
+    __slots__ = ("_segment", "sound")
+
     def __init__(self, segment: Union[str, Sound, SoundSegment]):
         super().__init__()
 
@@ -158,6 +179,16 @@ class SegmentToken(Token):
         else:
             self.segment = segment
 
+    @property
+    def segment(self):
+        return self._segment
+
+    @segment.setter
+    def segment(self, segment):
+        self._segment = segment
+        sounds = getattr(segment, "sounds", None)
+        self.sound = sounds[0] if sounds else None
+
     def __str__(self) -> str:
         return str(self.segment)
 
@@ -176,7 +207,7 @@ class SegmentToken(Token):
     def add_modifier(self, modifier):
         # TODO: properly implement with the __add__ operation from maniphono
         # hack using graphemic representation...
-        grapheme = str(self.segment.sounds[0])
+        grapheme = str(self.sound)
         sound = Sound(grapheme) + modifier
         segment = SoundSegment(sound)
         self.segment = segment
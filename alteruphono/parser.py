@@ -1,3 +1,4 @@
+import functools
 import re
 import unicodedata
 from typing import List, Tuple
@@ -21,6 +22,9 @@ RE_RULE_CTX = re.compile(r"^(?P<ante>[^>]+)>(?P<post>[^/]+)/(?P<context>.+)$")
 RE_BACKREF_NOMOD = re.compile(r"^@(?P<index>\d+)$")
 RE_BACKREF_MOD = re.compile(r"^@(?P<index>\d+)\[(?P<mod>[^\]]+)\]$")
 
+# Define the regex for collapsing runs of whitespace during preprocessing
+RE_WHITESPACE = re.compile(r"\s+")
+
 
 # TODO: __repr__, __str__, and __hash__ should deal with ante and post, not source
 class Rule:
@@ -32,10 +36,17 @@ class Rule:
         self.ante: List[Token] = _ante
         self.post: List[Token] = _post
 
+        # The representation is only computed on first request (it is mostly needed
+        # for debugging), and cached afterwards
+        self._repr = None
+
     def __repr__(self) -> str:
-        ante_str = " ".join([repr(token) for token in self.ante])
-        post_str = " ".join([repr(token) for token in self.post])
-        return "%s >>> %s" % (ante_str, post_str)
+        if self._repr is None:
+            ante_str = " ".join([repr(token) for token in self.ante])
+            post_str = " ".join([repr(token) for token in self.post])
+            self._repr = "%s >>> %s" % (ante_str, post_str)
+
+        return self._repr
 
     def __str__(self) -> str:
         return str(self.source)
@@ -46,6 +57,41 @@ class Rule:
     def __eq__(self, other) -> bool:
         return self.source == other.source
 
+    # The following views of the rule are used when applying it, particularly in
+    # backward direction; as they depend only on the rule, they are computed once
+    # and cached, instead of at every application (views that involve building
+    # maniphono segments are cached in the modules that use them)
+    @functools.cached_property
+    def post_no_empty(self) -> List[Token]:
+        """
+        The tokens of `post`, skipping empty (null) tokens.
+        """
+
+        return [token for token in self.post if not isinstance(token, EmptyToken)]
+
+    @functools.cached_property
+    def ante_set_indices(self) -> List[int]:
+        """
+        The indexes of the set tokens in `ante`.
+        """
+
+        return [idx for idx, token in enumerate(self.ante) if type(token) is SetToken]
+
+
+# Rules are usually applied many times (e.g., to all the entries of a lexicon), so
+# we keep a cache of the parsed `Rule` objects keyed by their source, avoiding
+# repeated parsing when the user passes rules as strings
+@functools.lru_cache(maxsize=1024)
+def _parse_rule_cached(source: str) -> Rule:
+    """
+    Internal function for obtaining a (cached) `Rule` from its textual source.
+
+    @param source: The textual representation of the rule.
+    @return: The parsed `Rule`.
+    """
+
+    return Rule(source)
+
 
 def preprocess(rule: str) -> str:
     """
@@ -58,8 +104,12 @@ def preprocess(rule: str) -> str:
     # 1. Normalize to NFD, as per maniphono
     rule = unicodedata.normalize("NFD", rule)
 
-    # 2. Replace multiple spaces with single ones, and remove leading/trailing spaces
-    rule = re.sub(r"\s+", " ", rule.strip())
+    # 2. Replace multiple spaces with single ones, and remove leading/trailing spaces;
+    # as most rules are already normalized, the regex is only run when there are runs
+    # of spaces or other whitespace characters (which are not printable)
+    rule = rule.strip()
+    if "  " in rule or not rule.isprintable():
+        rule = RE_WHITESPACE.sub(" ", rule)
 
     return rule
 
@@ -83,20 +133,23 @@ def parse_atom(atom_str: str) -> Token:
         return FocusToken()
     elif atom_str == ":null:":
         return EmptyToken()
-    elif (match := re.match(RE_BACKREF_MOD, atom_str)) is not None:
-        # Return the index as an integer, along with any modifier.
-        # Note that we substract one unit as our lists indexed from 1 (unlike Python,
-        # which indexes from zero)
-        # TODO: deal with modifiers
-        mod = match.group("mod")
-        index = int(match.group("index")) - 1
-        return BackRefToken(index, mod)
-    elif (match := re.match(RE_BACKREF_NOMOD, atom_str)) is not None:
-        # Return the index as an integer.
-        # Note that we substract one unit as our lists indexed from 1 (unlike Python,
-        # which indexes from zero)
-        index = int(match.group("index")) - 1
-        return BackRefToken(index)
+    elif atom_str[0] == "@":
+        # Only atoms starting with the back-reference marker are tested against the
+        # back-reference regular expressions, which are comparatively expensive
+        if (match := RE_BACKREF_MOD.match(atom_str)) is not None:
+            # Return the index as an integer, along with any modifier.
+            # Note that we substract one unit as our lists indexed from 1 (unlike
+            # Python, which indexes from zero)
+            # TODO: deal with modifiers
+            mod = match.group("mod")
+            index = int(match.group("index")) - 1
+            return BackRefToken(index, mod)
+        elif (match := RE_BACKREF_NOMOD.match(atom_str)) is not None:
+            # Return the index as an integer.
+            # Note that we substract one unit as our lists indexed from 1 (unlike
+            # Python, which indexes from zero)
+            index = int(match.group("index")) - 1
+            return BackRefToken(index)
 
     # Assume it is a grapheme
     return SegmentToken(atom_str)
@@ -104,7 +157,7 @@ def parse_atom(atom_str: str) -> Token:
 
 def parse_seq_as_rule(seq):
     seq = preprocess(seq)
-    return [parse_atom(atom) for atom in seq.strip().split()]
+    return [parse_atom(atom) for atom in seq.split()]
 
 
 def parse_rule(rule: str) -> Tuple[List[Token], List[Token]]:
@@ -116,25 +169,25 @@ def parse_rule(rule: str) -> Tuple[List[Token], List[Token]]:
     # is better, also due to our usage of named captures (that must be unique in the
     # whole regular expression)
     rule = preprocess(rule)
-    if (match := re.match(RE_RULE_CTX, rule)) is not None:
+    if (match := RE_RULE_CTX.match(rule)) is not None:
         ante, post, context = (
             match.group("ante"),
             match.group("post"),
             match.group("context"),
         )
-    elif (match := re.match(RE_RULE_NOCTX, rule)) is not None:
+    elif (match := RE_RULE_NOCTX.match(rule)) is not None:
         ante, post, context = match.group("ante"), match.group("post"), None
     else:
         raise ValueError("Unable to parse rule `rule`")
 
-    # Strip ante, post and context
-    ante_seq = [parse_atom(atom) for atom in ante.strip().split()]
-    post_seq = [parse_atom(atom) for atom in post.strip().split()]
+    # Split ante, post and context (`.split()` already drops leading/trailing spaces)
+    ante_seq = [parse_atom(atom) for atom in ante.split()]
+    post_seq = [parse_atom(atom) for atom in post.split()]
 
     # If there is a context, parse it, split in `left` and `right`, in terms of the
     # focus, and merge it to `ante` and `post` so that we return only these two seqs
     if context:
-        cntx_seq = [parse_atom(atom) for atom in context.strip().split()]
+        cntx_seq = [parse_atom(atom) for atom in context.split()]
         for idx, token in enumerate(cntx_seq):
             if isinstance(token, FocusToken):
                 left_seq, right_seq = cntx_seq[:idx], cntx_seq[idx + 1:]
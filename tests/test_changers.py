@@ -48,7 +48,14 @@ class TestChangers(unittest.TestCase):
                 "# b a r p V #",
                 "# p V r b a #",
                 "# p V r p V #",
-            )
+            ),
+            # no proto-forms with internal boundaries
+            ("C > :null: / _ #", "a d j aː"): (
+                "# a d j aː #",
+                "# a d j aː C #",
+            ),
+            # no repeated proto-forms from identical alternatives
+            ("p > p / _ a", "p a p a"): ("# p a p a #",),
         }
 
         # test with Model object
@@ -62,6 +69,59 @@ class TestChangers(unittest.TestCase):
 
             assert bw_strs == ref
 
+    def test_backward_empty_post(self):
+        # a `post` with only nulls would match everywhere, and cannot be reversed
+        with self.assertRaises(ValueError):
+            alteruphono.backward("# a b #", "C > :null:")
+
+    def test_string_arguments(self):
+        # rules and sequences given as strings are parsed (and rules cached)
+        for _ in range(2):
+            fw = alteruphono.forward("# p a t e #", "p > t / _ V")
+            assert " ".join([str(v) for v in fw]) == "# t a t e #"
+
+            bw = alteruphono.backward("# p a t e #", "p > t / _ V")
+            assert tuple([str(b) for b in bw]) == ("# p a p e #", "# p a t e #")
+
+    def test_chained_string_rules(self):
+        # the output of a cached rule must not share segments with it, so that
+        # applying other rules to the output does not change the cached rule
+        for _ in range(2):
+            fw = alteruphono.forward("# p a #", "p > b")
+            assert " ".join([str(v) for v in fw]) == "# b a #"
+            fw = alteruphono.forward(maniphono.SegSequence(fw), "b > @1[voiceless]")
+            assert " ".join([str(v) for v in fw]) == "# p a #"
+
+            bw = alteruphono.backward("# b a #", "p > b")
+            assert tuple([str(b) for b in bw]) == ("# b a #", "# p a #")
+            fw = alteruphono.forward(bw[1], "C > @1[voiced]")
+            assert " ".join([str(v) for v in fw]) == "# b a #"
+
+    def test_input_not_modified(self):
+        # applying rules, including back-references with modifiers, must not change
+        # the sequences given by the caller
+        ante = maniphono.parse_sequence("# p a t a #", boundaries=True)
+        fw = alteruphono.forward(ante, "C > @1[voiced]")
+        assert " ".join([str(v) for v in fw]) == "# b a d a #"
+        assert str(ante) == "# p a t a #"
+
+        post = maniphono.parse_sequence("# b a d a #", boundaries=True)
+        bw = alteruphono.backward(post, "C[voiceless] > @1[voiced]")
+        assert tuple([str(b) for b in bw]) == (
+            "# b a d a #",
+            "# b a d[-voiced] a #",
+            "# b[-voiced] a d a #",
+            "# b[-voiced] a d[-voiced] a #",
+        )  # TODO: fix with maniphono?
+        assert str(post) == "# b a d a #"
+
+    def test_forward_boundary_backref(self):
+        # modifiers on back-references to boundaries are ignored, as boundaries
+        # carry no features
+        ante = maniphono.parse_sequence("a p a", boundaries=True)
+        fw = alteruphono.forward(ante, alteruphono.Rule("# a > @1[voiced] a"))
+        assert " ".join([str(v) for v in fw]) == "# a p a #"
+
     # def test_forward_resources(self):
     #     sound_changes = alteruphono.utils.read_sound_changes()
     #
@@ -45,6 +45,11 @@ class TestParser(unittest.TestCase):
                 "ante": (SegmentToken("p"),),
                 "post": (SegmentToken("b"),),
             },
+            {
+                "rule": "p > @1[voiced]",
+                "ante": (SegmentToken("p"),),
+                "post": (BackRefToken(0, "voiced"),),
+            },
         ]
 
         for test in tests: